@@ -18,10 +18,14 @@ import sys
 
 # felt252 prime (for validation)
 FELT252_PRIME = 0x800000000000011000000000000000000000000000000000000000000000001
+# Conservative bound below FELT252_PRIME; anything strictly inside it is valid.
+_FELT252_BOUND = 1 << 251
 
 
 def validate_felt252(value: int, name: str) -> None:
     """Reject bounds that cannot be represented in felt252."""
+    if -_FELT252_BOUND < value < _FELT252_BOUND:
+        return
     if value < 0:
         # Negative values are represented as P - |value| in felt252
         if abs(value) >= FELT252_PRIME:
@@ -7,21 +7,26 @@ Wrapper around `controller` (controller-cli) that enforces:
 - explicit network selection for networked commands
 - structured error handling
 
+Set CONTROLLER_BIN to the controller executable to skip the PATH lookup.
+Pass `--pretty` (consumed by the wrapper) to re-indent successful output;
+by default controller's JSON is forwarded verbatim.
+
 Stdlib-only so it can run in CI and constrained environments.
 """
 
 from __future__ import annotations
 
 import json
+import os
 import shutil
 import subprocess
 import sys
 
 
-NETWORK_REQUIRED = {"call", "execute", "register", "transaction"}
+NETWORK_REQUIRED = frozenset({"call", "execute", "register", "transaction"})
 
 
-def _has_flag(args: list[str], flag: str) -> bool:
+def _has_flag(args: frozenset[str], flag: str) -> bool:
     return flag in args
 
 
@@ -30,40 +35,55 @@ def main(argv: list[str]) -> int:
         print("usage: controller_safe.py <subcommand> [args...]", file=sys.stderr)
         return 2
 
-    if shutil.which("controller") is None:
-        print("error: 'controller' not found in PATH (install controller-cli first)", file=sys.stderr)
-        return 127
-
     subcmd = argv[1]
     args = argv[2:]
+    # Build the lookup set once; calldata-heavy commands can have long arg lists.
+    arg_set = frozenset(args)
+
+    pretty = _has_flag(arg_set, "--pretty")
+    if pretty:
+        args = [a for a in args if a != "--pretty"]
 
-    if subcmd in NETWORK_REQUIRED and not (_has_flag(args, "--chain-id") or _has_flag(args, "--rpc-url")):
+    # Argument checks run before the PATH lookup so bad invocations fail fast.
+    if subcmd in NETWORK_REQUIRED and not (_has_flag(arg_set, "--chain-id") or _has_flag(arg_set, "--rpc-url")):
         print(
             f"error: controller '{subcmd}' requires explicit network: pass --chain-id SN_MAIN|SN_SEPOLIA or --rpc-url <url>",
             file=sys.stderr,
         )
         return 2
 
-    if not _has_flag(args, "--json"):
-        args = [*args, "--json"]
+    # CONTROLLER_BIN lets batch callers (Makefiles, xargs loops) resolve the
+    # binary once instead of walking PATH on every invocation.
+    controller_bin = os.environ.get("CONTROLLER_BIN") or shutil.which("controller")
+    if controller_bin is None:
+        print("error: 'controller' not found in PATH (install controller-cli first)", file=sys.stderr)
+        return 127
 
-    proc = subprocess.run(
-        ["controller", subcmd, *args],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-    )
+    if not _has_flag(arg_set, "--json"):
+        args.append("--json")
 
-    if proc.stderr.strip():
-        print(proc.stderr.rstrip("\n"), file=sys.stderr)
+    # stderr is inherited so controller diagnostics stream through as they are
+    # written instead of being buffered in memory. stdout stays as bytes:
+    # json.loads accepts bytes directly, so we skip a full UTF-8 decode + strip
+    # copy of potentially large payloads.
+    sys.stderr.flush()
+    try:
+        proc = subprocess.run(
+            [controller_bin, subcmd, *args],
+            stdout=subprocess.PIPE,
+        )
+    except OSError:
+        # CONTROLLER_BIN is taken on trust; a stale path surfaces here
+        print(f"error: controller not found at '{controller_bin}' (check CONTROLLER_BIN or install controller-cli)", file=sys.stderr)
+        return 127
 
-    stdout = proc.stdout.strip()
     try:
-        payload = json.loads(stdout)
+        payload = json.loads(proc.stdout)
     except Exception:
         print(f"error: controller output is not valid JSON (exit {proc.returncode})", file=sys.stderr)
+        stdout = proc.stdout.strip()
         if stdout:
-            print(stdout, file=sys.stderr)
+            print(stdout.decode("utf-8", errors="replace"), file=sys.stderr)
         return 1
 
     if payload.get("status") == "error":
@@ -86,8 +106,16 @@ def main(argv: list[str]) -> int:
         sys.stderr.write("\n")
         return proc.returncode
 
-    json.dump(payload, sys.stdout, indent=2)
-    sys.stdout.write("\n")
+    if pretty:
+        json.dump(payload, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return 0
+
+    # The bytes already parsed as valid JSON; forward them without re-serializing.
+    sys.stdout.flush()
+    sys.stdout.buffer.write(proc.stdout)
+    if not proc.stdout.endswith(b"\n"):
+        sys.stdout.buffer.write(b"\n")
     return 0
 
 
@@ -16,13 +16,14 @@ def main(argv: list[str]) -> int:
 
     bad = 0
     for s in argv[1:]:
-        if not HEX_ADDRESS.match(s):
-            print(f"invalid hex address: {s}", file=sys.stderr)
-            bad = 1
-            continue
+        # Reject over-long input before the regex so adversarial strings are O(1).
         if len(s) > MAX_ADDRESS_LEN:
             print(f"invalid hex address (too long): {s}", file=sys.stderr)
             bad = 1
+            continue
+        if not HEX_ADDRESS.match(s):
+            print(f"invalid hex address: {s}", file=sys.stderr)
+            bad = 1
     return bad
 
 
@@ -13,13 +13,26 @@ Wallet Deep Links:
     braavos://starknet/pay?address=0x...&amount=0.5&memo=coffee
 """
 
-from urllib.parse import urlencode, parse_qs, urlparse
+from urllib.parse import urlencode, parse_qsl, urlparse
 from dataclasses import dataclass
 from typing import Optional, Dict
 from enum import Enum
+from functools import lru_cache
 import re
 
 
+# Optional 0x prefix followed by exactly 64 hex characters
+_ADDRESS_RE = re.compile(r"(?:0x)?[0-9a-f]{64}", re.IGNORECASE)
+
+
+def _first_values(query_string: str) -> Dict[str, str]:
+    """Decode a query string keeping the first value of repeated keys"""
+    query = {}
+    for key, value in parse_qsl(query_string):
+        query.setdefault(key, value)
+    return query
+
+
 class InvoiceStatus(Enum):
     """Invoice status"""
     PENDING = "pending"
@@ -28,7 +41,7 @@ class InvoiceStatus(Enum):
     CANCELLED = "cancelled"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class PaymentLinkData:
     """Parsed payment link data"""
     address: str
@@ -83,30 +96,7 @@ class PaymentLinkBuilder:
         if not self._validate_address(address):
             raise ValueError(f"Invalid Starknet address: {address}")
         
-        # Validate token
-        token = token.upper()
-        if token not in self.VALID_TOKENS:
-            raise ValueError(f"Invalid token: {token}. Valid: {self.VALID_TOKENS}")
-        
-        # Build parameters
-        params = {}
-        
-        if amount is not None and amount > 0:
-            params["amount"] = str(amount)
-        
-        if memo:
-            params["memo"] = str(memo)[:128]  # Limit memo length
-        
-        if token != self.DEFAULT_TOKEN:
-            params["token"] = token
-        
-        # Build URL
-        query_string = urlencode(params)
-        
-        if query_string:
-            return f"{self.PROTOCOL}:{address}?{query_string}"
-        else:
-            return f"{self.PROTOCOL}:{address}"
+        return self._format_payment_link(address, self._build_query(amount, memo, token))
     
     def create_wallet_deep_links(
         self,
@@ -129,29 +119,85 @@ class PaymentLinkBuilder:
         """
         # Normalize address
         address = self._normalize_address(address)
+        full_params = f"?{self._build_wallet_query(address, self._build_query(amount, memo, token))}"
         
-        # Build params
-        params = {
-            "address": address
+        return {
+            "argent": f"{self.WALLET_SCHEMES['argent']}{full_params}",
+            "braavos": f"{self.WALLET_SCHEMES['braavos']}{full_params}",
+            "generic": f"{self.WALLET_SCHEMES['generic']}{address}"
         }
+    
+    def create_all_links(
+        self,
+        address: str,
+        amount: Optional[float] = None,
+        memo: Optional[str] = None,
+        token: str = "ETH"
+    ) -> Dict[str, str]:
+        """
+        Create the payment link and wallet deep links from one encoded query
         
-        if amount is not None:
+        Args:
+            address: Recipient Starknet address (0x...)
+            amount: Amount to request
+            memo: Payment description/memo
+            token: Token symbol
+        
+        Returns:
+            Dict with 'payment', 'argent', 'braavos' keys
+        """
+        if not self._validate_address(address):
+            raise ValueError(f"Invalid Starknet address: {address}")
+        
+        # Encode once; the deep links only prepend the address parameter
+        query_string = self._build_query(amount, memo, token)
+        payment = self._format_payment_link(address, query_string)
+        wallet_query = self._build_wallet_query(self._normalize_address(address), query_string)
+        
+        return {
+            "payment": payment,
+            "argent": f"{self.WALLET_SCHEMES['argent']}?{wallet_query}",
+            "braavos": f"{self.WALLET_SCHEMES['braavos']}?{wallet_query}"
+        }
+    
+    def _build_query(
+        self,
+        amount: Optional[float] = None,
+        memo: Optional[str] = None,
+        token: str = "ETH"
+    ) -> str:
+        """Encode the amount/memo/token query shared by all link formats"""
+        # Validate token
+        token = token.upper()
+        if token not in self.VALID_TOKENS:
+            raise ValueError(f"Invalid token: {token}. Valid: {self.VALID_TOKENS}")
+        
+        params = {}
+        
+        if amount is not None and amount > 0:
             params["amount"] = str(amount)
         
         if memo:
-            params["memo"] = str(memo)[:128]
+            params["memo"] = str(memo)[:128]  # Limit memo length
         
-        if token.upper() != self.DEFAULT_TOKEN:
+        if token != self.DEFAULT_TOKEN:
             params["token"] = token
         
-        query_string = urlencode(params)
-        full_params = f"?{query_string}"
-        
-        return {
-            "argent": f"{self.WALLET_SCHEMES['argent']}{full_params}",
-            "braavos": f"{self.WALLET_SCHEMES['braavos']}{full_params}",
-            "generic": f"{self.WALLET_SCHEMES['generic']}{address}"
-        }
+        return urlencode(params)
+    
+    def _format_payment_link(self, address: str, query_string: str) -> str:
+        """Join the address and the shared query into a payment link"""
+        if query_string:
+            return f"{self.PROTOCOL}:{address}?{query_string}"
+        else:
+            return f"{self.PROTOCOL}:{address}"
+    
+    def _build_wallet_query(self, address: str, query_string: str) -> str:
+        """Prefix the shared query with the deep link address (must be normalized)"""
+        wallet_query = urlencode({"address": address})
+        if query_string:
+            return f"{wallet_query}&{query_string}"
+        return wallet_query
     
     def create_argent_link(
         self,
@@ -160,7 +206,8 @@ class PaymentLinkBuilder:
         memo: Optional[str] = None
     ) -> str:
         """Create Argent X deep link"""
-        return self.create_wallet_deep_links(address, amount, memo)["argent"]
+        query = self._build_wallet_query(self._normalize_address(address), self._build_query(amount, memo))
+        return f"{self.WALLET_SCHEMES['argent']}?{query}"
     
     def create_braavos_link(
         self,
@@ -169,7 +216,8 @@ class PaymentLinkBuilder:
         memo: Optional[str] = None
     ) -> str:
         """Create Braavos deep link"""
-        return self.create_wallet_deep_links(address, amount, memo)["braavos"]
+        query = self._build_wallet_query(self._normalize_address(address), self._build_query(amount, memo))
+        return f"{self.WALLET_SCHEMES['braavos']}?{query}"
     
     def parse(self, url: str) -> PaymentLinkData:
         """
@@ -206,16 +254,16 @@ class PaymentLinkBuilder:
         # Clean address
         address = address.strip()
         
-        # Parse query parameters
-        query = parse_qs(parsed.query)
+        # Parse query parameters (first value wins, as wallets read them)
+        query = _first_values(parsed.query)
         
         # Extract values
-        amount_str = query.get("amount", [None])[0]
+        amount_str = query.get("amount")
         amount = float(amount_str) if amount_str else None
         
-        memo = query.get("memo", [None])[0]
+        memo = query.get("memo")
         
-        token = query.get("token", [self.DEFAULT_TOKEN])[0]
+        token = query.get("token", self.DEFAULT_TOKEN)
         
         return PaymentLinkData(
             address=self._normalize_address(address),
@@ -229,12 +277,12 @@ class PaymentLinkBuilder:
         parsed = urlparse(url)
         
         # Extract address from query
-        query = parse_qs(parsed.query)
+        query = _first_values(parsed.query)
         
-        address = query.get("address", [None])[0]
-        amount_str = query.get("amount", [None])[0]
+        address = query.get("address")
+        amount_str = query.get("amount")
         amount = float(amount_str) if amount_str else None
-        memo = query.get("memo", [None])[0]
+        memo = query.get("memo")
         
         # Determine wallet type
         scheme = parsed.scheme
@@ -295,22 +343,23 @@ class PaymentLinkBuilder:
         
         return f"{self.PROTOCOL}:invoice/{invoice_id}?{urlencode(params)}"
     
-    def _validate_address(self, address: str) -> bool:
+    def is_valid_address(self, address: str) -> bool:
+        """Check a bare Starknet address (0x + 64 hex characters)"""
+        return self._validate_address(address)
+    
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _validate_address(address: str) -> bool:
         """Validate Starknet address format"""
         if not address:
             return False
         
-        # Remove 0x prefix for validation
-        addr = address.lower().replace("0x", "")
-        
         # Starknet addresses are 64 hex characters
-        if len(addr) != 64:
-            return False
-        
-        # Check all characters are valid hex
-        return bool(re.match(r'^[0-9a-f]+$', addr))
+        return _ADDRESS_RE.fullmatch(address) is not None
     
-    def _normalize_address(self, address: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _normalize_address(address: str) -> str:
         """Normalize address to lowercase with 0x prefix"""
         addr = address.strip().lower()
         if not addr.startswith("0x"):
@@ -350,16 +399,24 @@ class PaymentLinkBuilder:
 
 
 # Utility functions
+# Shared builder for the helpers below (the builder holds no per-call state)
+_DEFAULT_BUILDER = PaymentLinkBuilder()
+
+
+@lru_cache(maxsize=1024)
+def _parse_cached(url: str) -> PaymentLinkData:
+    """Parse via the shared builder; repeated URLs (e.g. QR re-renders) hit the cache"""
+    return _DEFAULT_BUILDER.parse(url)
+
+
 def create_quick_link(address: str, amount: float, token: str = "ETH") -> str:
     """Quick helper to create a payment link"""
-    builder = PaymentLinkBuilder()
-    return builder.create(address, amount, token=token)
+    return _DEFAULT_BUILDER.create(address, amount, token=token)
 
 
 def parse_payment_url(url: str) -> dict:
     """Quick helper to parse a payment URL"""
-    builder = PaymentLinkBuilder()
-    data = builder.parse(url)
+    data = _parse_cached(url)
     return {
         "address": data.address,
         "amount": data.amount,
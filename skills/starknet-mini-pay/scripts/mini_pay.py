@@ -9,21 +9,60 @@ Token addresses from official sources:
 """
 
 import asyncio
+import contextlib
 import logging
-from typing import Optional, Dict, Any, List
+import time
+from typing import Optional, Dict, Any, List, AsyncIterator, Tuple, Union
 from dataclasses import dataclass
 from enum import Enum
 
+import aiohttp
 from starknet_py.net.full_node_client import FullNodeClient
 from starknet_py.net.account.account import Account
 from starknet_py.net.signer.key_pair import KeyPair
-from starknet_py.contract import Contract
 from starknet_py.net.client_models import Call
 from starknet_py.hash.selector import get_selector_from_name
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Entry point selectors (starknet-keccak), computed once at import
+_SEL_BALANCE_OF = get_selector_from_name("balanceOf")
+_SEL_TRANSFER = get_selector_from_name("transfer")
+
+_U128_MASK = (1 << 128) - 1
+
+
+def _classify_status(execution: Any, finality: Any, legacy: Any = "") -> str:
+    """Map receipt execution/finality (or legacy) status to a MiniPay status."""
+    exec_s = str(execution).upper()
+    fin_s = str(finality).upper()
+    status_s = str(legacy).upper()
+    
+    if 'SUCCEEDED' in exec_s and 'ACCEPTED' in fin_s:
+        return "CONFIRMED"
+    elif 'REVERTED' in exec_s or 'REJECTED' in fin_s:
+        return "REJECTED"
+    elif 'PENDING' in exec_s:
+        return "PENDING"
+    elif 'ACCEPTED' in status_s:
+        return "CONFIRMED"
+    elif 'PENDING' in status_s:
+        return "PENDING"
+    elif 'REJECTED' in status_s:
+        return "REJECTED"
+    return "UNKNOWN"
+
+
+def _with_block_number(tx: Dict[str, Any], block_number: Optional[int]) -> Dict[str, Any]:
+    """Merge the receipt's block number into transaction data, if it has one."""
+    return tx if block_number is None else {**tx, "block_number": block_number}
+
+
+def _to_int(address: Union[str, int]) -> int:
+    """Accept an already-parsed address as-is; parse hex strings."""
+    return address if isinstance(address, int) else int(address, 16)
+
 
 class Token(Enum):
     ETH = "ETH"
@@ -58,6 +97,7 @@ class PaymentResult:
 class MiniPay:
     """Core Mini-Pay class for Starknet payments."""
     
+    # Kept for callers that build their own Contract; transfer() encodes calls directly.
     ERC20_ABI = [
         {
             "name": "transfer",
@@ -78,23 +118,67 @@ class MiniPay:
         }
     ]
     
-    def __init__(self, rpc_url: str = "https://rpc.starknet.lava.build:443", network: str = "mainnet"):
+    # Upper bound on calls per JSON-RPC batch; providers cap batch sizes
+    MAX_BATCH_SIZE = 20
+    
+    # Shortest retry backoff worth waiting for under a transfer time budget
+    MIN_RETRY_BACKOFF = 0.25
+    
+    def __init__(
+        self,
+        rpc_url: str = "https://rpc.starknet.lava.build:443",
+        network: str = "mainnet",
+        session: Optional[aiohttp.ClientSession] = None,
+    ):
+        """
+        Args:
+            rpc_url: Starknet JSON-RPC endpoint
+            network: "mainnet" or "sepolia"
+            session: Shared aiohttp session for RPC calls. Without one (and
+                without `connect()`), each RPC call opens its own connection.
+        """
         self.rpc_url = rpc_url
         self.network = network.lower()
-        self.client = FullNodeClient(node_url=rpc_url)
+        self.session = session
+        self._owns_session = False
+        self.client = FullNodeClient(node_url=rpc_url, session=session)
         
         if self.network == "sepolia":
             self.tokens = SEPOLIA_TOKENS.copy()
         else:
             self.tokens = MAINNET_TOKENS.copy()
     
+    async def connect(self) -> None:
+        """Open a keep-alive HTTP session reused by every RPC call."""
+        if self.session is not None:
+            return
+        connector = aiohttp.TCPConnector(limit=32, keepalive_timeout=60, ttl_dns_cache=300)
+        self.session = aiohttp.ClientSession(connector=connector)
+        self._owns_session = True
+        self.client = FullNodeClient(node_url=self.rpc_url, session=self.session)
+    
+    async def disconnect(self) -> None:
+        """Close the session opened by `connect()` (caller-provided sessions are left open)."""
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+            self._owns_session = False
+            self.client = FullNodeClient(node_url=self.rpc_url)
+    
+    async def __aenter__(self) -> "MiniPay":
+        await self.connect()
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.disconnect()
+    
     def _get_token_decimals(self, token: str) -> int:
         return {"ETH": 18, "STRK": 18, "USDC": 6}.get(token.upper(), 18)
     
-    def _create_account(self, address: str, private_key: str) -> Account:
+    def _create_account(self, address: Union[str, int], private_key: str) -> Account:
         key_pair = KeyPair.from_private_key(int(private_key, 16))
         return Account(
-            address=int(address, 16),
+            address=_to_int(address),
             client=self.client,
             key_pair=key_pair,
         )
@@ -112,7 +196,95 @@ class MiniPay:
                     pass
             raise
     
-    async def get_balance(self, address: str, token: str = "ETH") -> int:
+    async def _rpc_batch(self, requests: List[tuple], return_exceptions: bool = False) -> List[Any]:
+        """
+        Send (method, params) pairs as a single JSON-RPC batch.
+        
+        Returns results in request order. Raises RuntimeError if the provider
+        does not answer with a batch. A failed item raises too, unless
+        `return_exceptions` is set: its RuntimeError is then returned in place
+        of the result, as with `asyncio.gather`.
+        """
+        payload = [
+            {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+            for i, (method, params) in enumerate(requests)
+        ]
+        
+        async with self._session_scope() as session:
+            replies = await self._post_json(session, payload)
+        
+        if not isinstance(replies, list):
+            raise RuntimeError("RPC provider does not support JSON-RPC batches")
+        
+        by_id = {reply.get("id"): reply for reply in replies}
+        results = []
+        for i in range(len(requests)):
+            reply = by_id.get(i)
+            if reply is None or "error" in reply:
+                error = reply.get("error") if reply else "missing reply"
+                failure = RuntimeError(f"RPC batch item {i} failed: {error}")
+                if not return_exceptions:
+                    raise failure
+                results.append(failure)
+                continue
+            results.append(reply["result"])
+        return results
+    
+    @contextlib.asynccontextmanager
+    async def _session_scope(self) -> AsyncIterator[aiohttp.ClientSession]:
+        """Yield the shared session, or a temporary one if not connected."""
+        if self.session is not None:
+            yield self.session
+        else:
+            async with aiohttp.ClientSession() as session:
+                yield session
+    
+    async def _post_json(self, session: aiohttp.ClientSession, payload: Any) -> Any:
+        async with session.post(self.rpc_url, json=payload) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+    
+    async def get_balances(self, address: str, tokens: List[str]) -> Dict[str, int]:
+        """
+        Get several token balances with one JSON-RPC batch request.
+        
+        Falls back to concurrent `get_balance` calls if the provider rejects
+        batching.
+        """
+        symbols = [token.upper() for token in tokens]
+        for symbol in symbols:
+            if symbol not in self.tokens:
+                raise ValueError(f"Unknown token: {symbol}")
+        
+        account = hex(int(address, 16))
+        selector = hex(_SEL_BALANCE_OF)
+        
+        try:
+            balances = {}
+            for start in range(0, len(symbols), self.MAX_BATCH_SIZE):
+                chunk = symbols[start:start + self.MAX_BATCH_SIZE]
+                results = await self._rpc_batch([
+                    ("starknet_call", [
+                        {
+                            "contract_address": hex(self.tokens[symbol]),
+                            "entry_point_selector": selector,
+                            "calldata": [account],
+                        },
+                        "latest",
+                    ])
+                    for symbol in chunk
+                ])
+                for symbol, result in zip(chunk, results):
+                    low, high = result
+                    balances[symbol] = int(low, 16) | (int(high, 16) << 128)
+            return balances
+        except Exception as e:
+            logger.warning("Batched balance query failed, falling back to single calls: %s", e)
+        
+        values = await asyncio.gather(*(self.get_balance(address, symbol) for symbol in symbols))
+        return dict(zip(symbols, values))
+    
+    async def get_balance(self, address: Union[str, int], token: str = "ETH") -> int:
         """Get token balance for an address."""
         token_symbol = token.upper()
         
@@ -121,38 +293,31 @@ class MiniPay:
         
         try:
             token_address = self.tokens[token_symbol]
-            balance_of_selector = get_selector_from_name("balanceOf")
-            
             call = Call(
                 to_addr=token_address,
-                selector=balance_of_selector,
-                calldata=[int(address, 16)]
+                selector=_SEL_BALANCE_OF,
+                calldata=[_to_int(address)]
             )
             
             result = await self._call_contract(call)
             
-            if len(result) >= 2:
-                balance = result[0] + (result[1] << 128)
-            else:
-                balance = result[0]
-            
-            return balance
+            # balanceOf returns a Uint256 as exactly two felts (low, high)
+            low, high = result
+            return low | (high << 128)
             
         except Exception as e:
-            logger.error(f"Balance check failed for {address[:10]}: {e}")
+            logger.error("Balance check failed for %s: %s", str(address)[:10], e)
             raise
     
-    async def transfer(
+    def _prepare_transfer(
         self,
         from_address: str,
         private_key: str,
         to_address: str,
         amount_wei: int,
-        token: str = "ETH",
-        memo: Optional[str] = None,
-        max_retries: int = 3
-    ) -> str:
-        """Send a payment."""
+        token: str,
+    ) -> tuple:
+        """Validate transfer inputs; return (token_symbol, account, calls)."""
         token_symbol = token.upper()
         
         if token_symbol not in self.tokens:
@@ -161,107 +326,301 @@ class MiniPay:
         if amount_wei <= 0:
             raise ValueError("Amount must be positive")
         
+        if amount_wei >= 1 << 256:
+            raise ValueError("Amount exceeds u256 range")
+        
         try:
-            int(from_address, 16)
-            int(to_address, 16)
+            from_int = int(from_address, 16)
+            to_int = int(to_address, 16)
         except ValueError:
             raise ValueError("Invalid address format")
         
-        account = self._create_account(from_address, private_key)
+        account = self._create_account(from_int, private_key)
         
-        token_address = self.tokens[token_symbol]
-        contract = Contract(
-            address=token_address,
-            abi=self.ERC20_ABI,
-            client=self.client
+        # transfer(recipient: felt, amount: Uint256) encoded directly; avoids
+        # building a Contract and parsing the ABI on every payment.
+        transfer_call = Call(
+            to_addr=self.tokens[token_symbol],
+            selector=_SEL_TRANSFER,
+            calldata=[to_int, amount_wei & _U128_MASK, amount_wei >> 128],
         )
         
-        transfer_call = contract.functions["transfer"].prepare(
-            recipient=int(to_address, 16),
-            amount=amount_wei
-        )
+        return token_symbol, account, [transfer_call]
+    
+    async def transfer(
+        self,
+        from_address: str,
+        private_key: str,
+        to_address: str,
+        amount_wei: int,
+        token: str = "ETH",
+        memo: Optional[str] = None,
+        max_retries: int = 3,
+        total_timeout_s: Optional[float] = None,
+    ) -> str:
+        """
+        Send a payment.
+        
+        Fee estimation (with the ETH fee precheck) is retried with backoff.
+        With `total_timeout_s`, each estimate is cut off when the budget runs
+        out, backoff is capped at half of the remaining budget, and no retry
+        starts once that backoff would drop below `MIN_RETRY_BACKOFF`.
+        
+        The invoke itself is sent once and never cut off or retried: it may
+        already have reached the node, so on failure check the status instead
+        of resending.
+        """
+        if max_retries < 1:
+            raise ValueError("max_retries must be at least 1")
         
-        calls = [transfer_call]
+        token_symbol, account, calls = self._prepare_transfer(
+            from_address, private_key, to_address, amount_wei, token
+        )
+        deadline = None if total_timeout_s is None else time.monotonic() + total_timeout_s
         
         for attempt in range(max_retries):
             try:
-                estimated = await account.estimate_fee(calls)
-                max_fee = int(estimated.overall_fee * 1.5)
-                
-                logger.info(f"Estimated fee: {estimated.overall_fee / 10**18:.6f} ETH")
-                
-                if token_symbol != "ETH":
-                    eth_balance = await self.get_balance(from_address, "ETH")
-                    if eth_balance < max_fee:
-                        raise ValueError("Insufficient ETH for fees")
-                
-                logger.info(f"Sending {amount_wei / 10**self._get_token_decimals(token_symbol):.6f} {token_symbol}")
-                
-                result = await account.execute(calls, max_fee=max_fee)
-                tx_hash = hex(result.transaction_hash)
-                
-                logger.info(f"Transaction submitted: {tx_hash}")
-                return tx_hash
+                estimate = self._estimate_max_fee(account, calls, token_symbol)
+                if deadline is None:
+                    max_fee = await estimate
+                else:
+                    max_fee = await asyncio.wait_for(estimate, timeout=deadline - time.monotonic())
+                break
                 
             except Exception as e:
-                logger.warning(f"Attempt {attempt + 1}/{max_retries} failed: {e}")
+                logger.warning("Attempt %d/%d failed: %s", attempt + 1, max_retries, e)
                 
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(2 ** attempt)
+                backoff = 2 ** attempt
+                if deadline is not None:
+                    backoff = min(backoff, (deadline - time.monotonic()) / 2)
+                if attempt < max_retries - 1 and backoff >= self.MIN_RETRY_BACKOFF:
+                    await asyncio.sleep(backoff)
                     continue
                 
-                raise RuntimeError(f"Transaction failed after {max_retries} attempts")
+                raise RuntimeError(f"Transaction failed after {attempt + 1} attempts")
+        
+        logger.info(
+            "Sending %.6f %s",
+            amount_wei / 10**self._get_token_decimals(token_symbol),
+            token_symbol,
+        )
+        
+        result = await account.execute(calls, max_fee=max_fee)
+        tx_hash = hex(result.transaction_hash)
+        
+        logger.info("Transaction submitted: %s", tx_hash)
+        return tx_hash
     
-    async def wait_for_confirmation(self, tx_hash: str, max_wait_seconds: int = 180, poll_interval: float = 3.0) -> str:
-        """Wait for transaction to be confirmed."""
-        import time
-        start_time = time.time()
+    async def _estimate_max_fee(
+        self,
+        account: Account,
+        calls: List[Call],
+        token_symbol: str,
+    ) -> int:
+        """Estimate the fee with headroom and check the account's ETH covers it."""
+        if token_symbol != "ETH":
+            # Independent RPCs: overlap the fee estimate and the ETH precheck
+            estimated, eth_balance = await asyncio.gather(
+                account.estimate_fee(calls),
+                self.get_balance(account.address, "ETH"),
+            )
+        else:
+            estimated = await account.estimate_fee(calls)
+            eth_balance = None
         
-        logger.info(f"Waiting for confirmation of {tx_hash[:16]}...")
+        max_fee = int(estimated.overall_fee * 1.5)
         
-        while True:
-            elapsed = time.time() - start_time
-            if elapsed > max_wait_seconds:
-                return "TIMEOUT"
-            
-            status = await self.get_transaction_status(tx_hash)
+        logger.info("Estimated fee: %.6f ETH", estimated.overall_fee / 10**18)
+        
+        if eth_balance is not None and eth_balance < max_fee:
+            raise ValueError("Insufficient ETH for fees")
+        return max_fee
+    
+    async def wait_for_confirmation(
+        self,
+        tx_hash: str,
+        max_wait_seconds: int = 180,
+        poll_interval: float = 3.0,
+        max_poll_interval: float = 15.0,
+    ) -> str:
+        """
+        Wait for transaction to be confirmed.
+        
+        Polls with exponential backoff (x1.5 per miss, capped at
+        `max_poll_interval`) so slow blocks don't cost a call every few seconds.
+        """
+        deadline = time.monotonic() + max_wait_seconds
+        delay = poll_interval
+        
+        logger.info("Waiting for confirmation of %s...", tx_hash[:16])
+        
+        while (remaining := deadline - time.monotonic()) > 0:
+            try:
+                status = await asyncio.wait_for(
+                    self.get_transaction_status(tx_hash), timeout=remaining
+                )
+            except asyncio.TimeoutError:
+                break
             
             if status in ["CONFIRMED", "REJECTED", "FAILED"]:
                 return status
             
-            await asyncio.sleep(poll_interval)
+            await asyncio.sleep(min(delay, max(deadline - time.monotonic(), 0)))
+            delay = min(delay * 1.5, max_poll_interval)
+        
+        return "TIMEOUT"
     
-    async def get_transaction_status(self, tx_hash: str) -> str:
-        """Get transaction status."""
+    async def wait_for_confirmation_ws(
+        self,
+        tx_hash: str,
+        ws_url: Optional[str] = None,
+        max_wait_seconds: int = 180,
+    ) -> str:
+        """
+        Wait for confirmation via `starknet_subscribeTransactionStatus`.
+        
+        `ws_url` defaults to the RPC URL with its scheme switched to ws(s).
+        Falls back to polling `wait_for_confirmation` for whatever is left of
+        `max_wait_seconds` if the endpoint does not support subscriptions or
+        the subscription drops.
+        """
+        if ws_url is None:
+            ws_url = self.rpc_url.replace("https://", "wss://", 1).replace("http://", "ws://", 1)
+        
+        # One budget for both: a subscription that dies late leaves less to poll
+        deadline = time.monotonic() + max_wait_seconds
+        
         try:
-            receipt = await self.client.get_transaction_receipt(tx_hash)
+            return await asyncio.wait_for(
+                self._await_status_notification(ws_url, tx_hash),
+                timeout=max_wait_seconds,
+            )
+        except asyncio.TimeoutError:
+            return "TIMEOUT"
+        except Exception as e:
+            logger.info("Status subscription unavailable, polling instead: %s", e)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return "TIMEOUT"
+            return await self.wait_for_confirmation(tx_hash, max_wait_seconds=remaining)
+    
+    async def _await_status_notification(self, ws_url: str, tx_hash: str) -> str:
+        async with self._session_scope() as session:
+            return await self._subscribe_status(session, ws_url, tx_hash)
+    
+    async def _subscribe_status(self, session: aiohttp.ClientSession, ws_url: str, tx_hash: str) -> str:
+        async with session.ws_connect(ws_url) as ws:
+            await ws.send_json({
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "starknet_subscribeTransactionStatus",
+                "params": {"transaction_hash": tx_hash},
+            })
             
-            if hasattr(receipt, 'execution_status'):
-                exec_status = str(receipt.execution_status).upper()
-                finality = getattr(receipt, 'finality_status', '')
+            async for msg in ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    break
+                data = msg.json()
+                if data.get("id") == 1 and "error" in data:
+                    raise RuntimeError(f"subscription rejected: {data['error']}")
                 
-                if 'SUCCEEDED' in exec_status and 'ACCEPTED' in str(finality).upper():
-                    return "CONFIRMED"
-                elif 'REVERTED' in exec_status or 'REJECTED' in str(finality).upper():
+                status = (data.get("params") or {}).get("result", {}).get("status")
+                if not status:
+                    continue
+                
+                finality = str(status.get("finality_status", "")).upper()
+                execution = str(status.get("execution_status", "")).upper()
+                if "REJECTED" in finality or "REVERTED" in execution:
                     return "REJECTED"
-                elif 'PENDING' in exec_status:
-                    return "PENDING"
-            
-            if hasattr(receipt, 'status'):
-                status = str(receipt.status).upper()
-                if 'ACCEPTED' in status:
+                if "ACCEPTED" in finality and "SUCCEEDED" in execution:
                     return "CONFIRMED"
-                elif 'PENDING' in status:
-                    return "PENDING"
-                elif 'REJECTED' in status:
-                    return "REJECTED"
+        
+        raise RuntimeError("subscription closed before the transaction was accepted")
+    
+    async def get_transaction_status(self, tx_hash: str) -> str:
+        """Get transaction status."""
+        status, _ = await self._receipt_status(tx_hash)
+        return status
+    
+    async def _receipt_status(self, tx_hash: str) -> Tuple[str, Optional[int]]:
+        """Get transaction status and block number (None until included)."""
+        try:
+            receipt = await self.client.get_transaction_receipt(tx_hash)
             
-            return "UNKNOWN"
+            # Read each attribute once; the wait loop calls this on every poll
+            return _classify_status(
+                getattr(receipt, 'execution_status', ''),
+                getattr(receipt, 'finality_status', ''),
+                getattr(receipt, 'status', ''),
+            ), getattr(receipt, 'block_number', None)
             
         except Exception as e:
             if "not found" in str(e).lower():
-                return "NOT_FOUND"
-            return f"ERROR"
+                return "NOT_FOUND", None
+            return f"ERROR", None
+    
+    async def get_transaction(self, tx_hash: str) -> Dict[str, Any]:
+        """Get raw transaction data (starknet_getTransactionByHash)."""
+        payload = {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "starknet_getTransactionByHash",
+            "params": [tx_hash],
+        }
+        
+        async with self._session_scope() as session:
+            reply = await self._post_json(session, payload)
+        
+        if "error" in reply:
+            raise RuntimeError(f"starknet_getTransactionByHash failed: {reply['error']}")
+        return reply["result"]
+    
+    async def get_status_and_transaction(self, tx_hash: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Get transaction status and data with one JSON-RPC batch request.
+        
+        The receipt supplies the status and `block_number` (merged into the
+        returned transaction dict once the transaction is in a block). Item
+        errors are handled per item: a missing receipt gives `NOT_FOUND`, and
+        transaction data is `{}` when its lookup fails. Falls back to
+        concurrent receipt / `get_transaction` calls only if the batch itself
+        fails.
+        """
+        try:
+            receipt, tx = await self._rpc_batch([
+                ("starknet_getTransactionReceipt", [tx_hash]),
+                ("starknet_getTransactionByHash", [tx_hash]),
+            ], return_exceptions=True)
+        except Exception as e:
+            logger.warning("Batched transaction query failed, falling back to single calls: %s", e)
+        else:
+            if isinstance(tx, Exception):
+                # Expected while a fresh transaction propagates; not worth a warning
+                if "not found" not in str(tx).lower():
+                    logger.warning("Transaction lookup failed for %s: %s", tx_hash[:16], tx)
+                tx = {}
+            if isinstance(receipt, Exception):
+                status = "NOT_FOUND" if "not found" in str(receipt).lower() else "ERROR"
+                return status, tx
+            status = _classify_status(
+                receipt.get("execution_status", ""),
+                receipt.get("finality_status", ""),
+                receipt.get("status", ""),
+            )
+            return status, _with_block_number(tx, receipt.get("block_number"))
+        
+        status, tx = await asyncio.gather(
+            self._receipt_status(tx_hash),
+            self.get_transaction(tx_hash),
+            return_exceptions=True,
+        )
+        if isinstance(status, Exception):
+            raise status
+        if isinstance(tx, Exception):
+            logger.warning("Transaction lookup failed for %s: %s", tx_hash[:16], tx)
+            tx = {}
+        status, block_number = status
+        return status, _with_block_number(tx, block_number)
     
     async def get_block_number(self) -> int:
         """Get current block number."""
@@ -271,19 +630,20 @@ class MiniPay:
 async def example():
     """Example usage."""
     RPC = "https://starknet-mainnet.g.alchemy.com/v2/lq2wTFNVuh1mmqC7oPcYw"
-    pay = MiniPay(RPC)
-    
     addr = "0x068047beadC45aFF253839D4DD7c2cD1c27D502738BAd0AF935D402bdf9244ED"
     
     print(f"Address: {addr}\n")
     
-    for token in ["ETH", "STRK", "USDC"]:
+    async with MiniPay(RPC) as pay:
         try:
-            balance = await pay.get_balance(addr, token)
+            balances = await pay.get_balances(addr, ["ETH", "STRK", "USDC"])
+        except Exception as e:
+            print(f"Error - {str(e)[:50]}")
+            balances = {}
+        
+        for token, balance in balances.items():
             decimals = 18 if token != "USDC" else 6
             print(f"{token}: {balance / 10**decimals:.6f}")
-        except Exception as e:
-            print(f"{token}: Error - {str(e)[:50]}")
     
     print("\n✓ MiniPay is ready!")
 
@@ -5,13 +5,27 @@ Generate QR codes for addresses and payment links
 
 import qrcode
 from qrcode.image.styledpil import StyledPilImage
-from qrcode.image.styles.moduledrawers import SquareModuleDrawer, GlowingSquareModuleDrawer
+from qrcode.image.svg import SvgPathImage
+from qrcode.image.styles.moduledrawers import SquareModuleDrawer
 from qrcode.image.styles.colormasks import SolidFillColorMask
-from PIL import Image
-from typing import Optional
+from PIL import Image, ImageDraw, ImageFont, ImageOps
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import groupby
+from typing import Optional, Dict
+import io
+import multiprocessing
 import os
 
 
+@lru_cache(maxsize=4096)
+def _checksum(address: str) -> str:
+    """Canonical form of an address, computed once per distinct input"""
+    if address.startswith("0x"):
+        return address.lower()
+    return address
+
+
 class QRGenerator:
     """Generate QR codes for Starknet addresses and payment links"""
     
@@ -24,16 +38,22 @@ class QRGenerator:
         "error": (0xAA, 0x00, 0x00),
     }
     
-    def __init__(self, box_size: int = 10, border: int = 2):
+    def __init__(self, box_size: int = 10, border: int = 2, compress_level: int = 1):
         """
         Initialize QR generator
         
         Args:
             box_size: Size of each QR module in pixels
             border: Border width in modules
+            compress_level: PNG zlib level (0-9); QR images compress well
+                even at 1, higher levels mostly cost CPU
         """
         self.box_size = box_size
         self.border = border
+        self.compress_level = compress_level
+        # Decoded/thumbnailed logos and loaded fonts, reused across a batch
+        self._logo_cache: Dict[tuple, Image.Image] = {}
+        self._font_cache: Dict[tuple, object] = {}
     
     def generate(
         self,
@@ -42,7 +62,8 @@ class QRGenerator:
         memo: Optional[str] = None,
         output_file: str = "qr_code.png",
         color: tuple = None,
-        logo_path: Optional[str] = None
+        logo_path: Optional[str] = None,
+        styled: bool = False
     ):
         """
         Generate QR code for a Starknet address
@@ -51,23 +72,16 @@ class QRGenerator:
             address: Starknet address (0x...)
             amount: Optional amount to pre-fill
             memo: Optional memo/note
-            output_file: Output file path
+            output_file: Output file path or binary file object
             color: RGB tuple for QR color
             logo_path: Optional logo to embed in center
+            styled: Render through qrcode's StyledPilImage (slower, same look)
         """
         # Build the data
         data = self._build_address_data(address, amount, memo)
         
         # Create QR code
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_H,  # High error correction for logos
-            box_size=self.box_size,
-            border=self.border,
-        )
-        
-        qr.add_data(data)
-        qr.make(fit=True)
+        qr = self._make_qr(data)
         
         # Generate image
         if color:
@@ -75,11 +89,14 @@ class QRGenerator:
         else:
             fg_color = self.COLORS["starknet"]
         
-        img = qr.make_image(
-            image_factory=StyledPilImage,
-            module_drawer=SquareModuleDrawer(),
-            color_mask=SolidFillColorMask(front_color=fg_color),
-        )
+        if styled:
+            img = qr.make_image(
+                image_factory=StyledPilImage,
+                module_drawer=SquareModuleDrawer(),
+                color_mask=SolidFillColorMask(front_color=fg_color),
+            ).get_image()
+        else:
+            img = self._render_matrix(qr, fg_color)
         
         # Add logo if provided
         if logo_path and os.path.exists(logo_path):
@@ -89,7 +106,7 @@ class QRGenerator:
         img = self._add_label(img, address)
         
         # Save
-        img.save(output_file)
+        img.save(output_file, format="PNG", compress_level=self.compress_level, optimize=False)
         return output_file
     
     def generate_link(
@@ -103,51 +120,92 @@ class QRGenerator:
         
         Args:
             payment_link: Full payment link URL
-            output_file: Output file path
+            output_file: Output file path or binary file object
             color: RGB tuple for QR color
         """
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_H,
-            box_size=self.box_size,
-            border=self.border,
-        )
-        
-        qr.add_data(payment_link)
-        qr.make(fit=True)
+        qr = self._make_qr(payment_link)
         
         if color:
             fg_color = color
         else:
             fg_color = self.COLORS["primary"]
         
-        img = qr.make_image(
-            image_factory=StyledPilImage,
-            module_drawer=GlowingSquareModuleDrawer(),
-            color_mask=SolidFillColorMask(front_color=fg_color),
-        )
+        img = self._render_matrix(qr, fg_color)
         
-        img.save(output_file)
+        img.save(output_file, format="PNG", compress_level=self.compress_level, optimize=False)
         return output_file
     
+    def generate_bytes(self, payment_link: str, color: tuple = None) -> bytes:
+        """
+        Generate a payment link QR as PNG bytes (no file written)
+        
+        Args:
+            payment_link: Full payment link URL
+            color: RGB tuple for QR color
+        """
+        buf = io.BytesIO()
+        self.generate_link(payment_link, output_file=buf, color=color)
+        return buf.getvalue()
+    
+    # Below this many QRs, process start-up costs more than it saves
+    PARALLEL_BATCH_THRESHOLD = 4
+    
     def generate_batch(
         self,
         addresses: list,
-        output_dir: str = "."
+        output_dir: str = ".",
+        max_workers: Optional[int] = None
     ):
         """
         Generate QR codes for multiple addresses
         
+        Rendering is CPU-bound, so larger batches are spread over a process pool.
+        
         Args:
             addresses: List of (address, filename) tuples
             output_dir: Output directory
+            max_workers: Worker processes (default: CPU count)
         """
-        results = []
-        for address, filename in addresses:
-            output_path = os.path.join(output_dir, filename)
-            self.generate(address, output_file=output_path)
-            results.append(output_path)
-        return results
+        jobs = [
+            (address, os.path.join(output_dir, filename), self.box_size, self.border, self.compress_level)
+            for address, filename in addresses
+        ]
+        
+        if len(jobs) < self.PARALLEL_BATCH_THRESHOLD:
+            for address, output_path, *_ in jobs:
+                self.generate(address, output_file=output_path)
+            return [job[1] for job in jobs]
+        
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=pool_context()) as executor:
+            return list(executor.map(_render_one, jobs))
+    
+    def _make_qr(self, data: str) -> qrcode.QRCode:
+        """Encode data at ECC-H (high error correction so logos stay scannable)"""
+        qr = qrcode.QRCode(
+            version=1,
+            error_correction=qrcode.constants.ERROR_CORRECT_H,
+            box_size=self.box_size,
+            border=self.border,
+        )
+        qr.add_data(data)
+        qr.make(fit=True)
+        return qr
+    
+    def _render_matrix(self, qr: qrcode.QRCode, fg_color: tuple) -> Image.Image:
+        """
+        Render square modules from the raw QR matrix.
+        
+        Builds a one-pixel-per-module grayscale image, scales it up with
+        nearest-neighbour resampling and maps it to the colors, all inside
+        Pillow instead of drawing each module from Python.
+        """
+        matrix = qr.get_matrix()  # includes the border
+        size = len(matrix)
+        pixels = bytes(0 if dark else 255 for row in matrix for dark in row)
+        
+        modules = Image.frombytes("L", (size, size), pixels)
+        scaled = modules.resize((size * self.box_size, size * self.box_size), Image.Resampling.NEAREST)
+        return ImageOps.colorize(scaled, black=fg_color, white=self.COLORS["white"])
     
     def _build_address_data(
         self,
@@ -175,9 +233,7 @@ class QRGenerator:
     
     def _ensure_checksum(self, address: str) -> str:
         """Ensure address has proper checksum (lowercase by default)"""
-        if address.startswith("0x"):
-            return address.lower()
-        return address
+        return _checksum(address)
     
     def _add_logo(self, qr_image, logo_path: str, logo_size: float = 0.25) -> Image.Image:
         """
@@ -188,14 +244,11 @@ class QRGenerator:
             logo_path: Path to logo file
             logo_size: Size ratio (0.25 = 25% of QR size)
         """
-        logo = Image.open(logo_path)
-        
         # Calculate logo size
         qr_width, qr_height = qr_image.size
         logo_max_size = int(min(qr_width, qr_height) * logo_size)
         
-        # Resize logo maintaining aspect ratio
-        logo.thumbnail((logo_max_size, logo_max_size), Image.Resampling.LANCZOS)
+        logo = self._load_logo(logo_path, logo_max_size)
         
         # Calculate position (center)
         logo_width, logo_height = logo.size
@@ -216,27 +269,45 @@ class QRGenerator:
         
         return qr_image
     
+    def _load_logo(self, logo_path: str, max_size: int) -> Image.Image:
+        """Load a logo resized to fit max_size, cached per (path, size)"""
+        key = (logo_path, max_size)
+        logo = self._logo_cache.get(key)
+        if logo is None:
+            with Image.open(logo_path) as source:
+                logo = source.copy()
+            # Resize logo maintaining aspect ratio
+            logo.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+            self._logo_cache[key] = logo
+        return logo
+    
+    def _get_font(self, name: str, size: int):
+        """Load a TrueType font (default font if unavailable), cached per (name, size)"""
+        key = (name, size)
+        font = self._font_cache.get(key)
+        if font is None:
+            try:
+                font = ImageFont.truetype(name, size)
+            except Exception:
+                font = ImageFont.load_default()
+            self._font_cache[key] = font
+        return font
+    
     def _add_label(self, qr_image: Image.Image, address: str) -> Image.Image:
         """Add address label below QR code"""
-        # Create combined image
+        # Extend the canvas with a white strip for the label
         label_height = 50
-        total_height = qr_image.size[1] + label_height
-        
-        combined = Image.new("RGB", (qr_image.size[0], total_height), (255, 255, 255))
-        combined.paste(qr_image, (0, 0))
+        if qr_image.mode != "RGB":
+            qr_image = qr_image.convert("RGB")
+        combined = ImageOps.expand(qr_image, border=(0, 0, 0, label_height), fill=(255, 255, 255))
         
         # Add text
-        from PIL import ImageDraw, ImageFont
-        
         draw = ImageDraw.Draw(combined)
         
         # Shorten address for display
         short_addr = f"{address[:8]}...{address[-6:]}"
         
-        try:
-            font = ImageFont.truetype("arial.ttf", 20)
-        except:
-            font = ImageFont.load_default()
+        font = self._get_font("arial.ttf", 20)
         
         # Draw text
         text_width = draw.textlength(short_addr, font=font)
@@ -253,7 +324,8 @@ class QRGenerator:
         amount: Optional[float] = None,
         memo: Optional[str] = None,
         output_file: str = "qr_code.svg",
-        color: tuple = None
+        color: tuple = None,
+        styled: bool = False
     ):
         """
         Generate QR code as SVG (vector format)
@@ -264,20 +336,11 @@ class QRGenerator:
             memo: Optional memo
             output_file: Output SVG file path
             color: RGB tuple for QR color
+            styled: Render through qrcode's SvgPathImage (black, per-module path)
         """
-        import qrcode.image.svg
-        
         data = self._build_address_data(address, amount, memo)
         
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_H,
-            box_size=self.box_size,
-            border=self.border,
-        )
-        
-        qr.add_data(data)
-        qr.make(fit=True)
+        qr = self._make_qr(data)
         
         if color:
             fg_color = color
@@ -287,14 +350,81 @@ class QRGenerator:
         # Convert RGB to hex
         fg_hex = "#{:02x}{:02x}{:02x}".format(*fg_color)
         
-        img = qr.make_image(
-            image_factory=qrcode.image.svg.SvgPathImage,
-        )
+        if styled:
+            img = qr.make_image(
+                image_factory=SvgPathImage,
+            )
+            with open(output_file, "wb") as f:
+                f.write(img.to_string())
+            return output_file
         
         with open(output_file, "w") as f:
-            f.write(img.to_string())
+            f.write(self._matrix_to_svg(qr, fg_hex))
         
         return output_file
+    
+    def _matrix_to_svg(self, qr: qrcode.QRCode, fg_hex: str) -> str:
+        """
+        Build an SVG with one path, one rectangle per horizontal run of dark modules.
+        
+        Coordinates are in modules (viewBox); the border is part of the matrix.
+        """
+        matrix = qr.get_matrix()
+        size = len(matrix)
+        pixels = size * self.box_size
+        
+        segments = []
+        for y, row in enumerate(matrix):
+            x = 0
+            for dark, run in groupby(row):
+                width = len(list(run))
+                if dark:
+                    segments.append(f"M{x},{y}h{width}v1h-{width}z")
+                x += width
+        
+        return (
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{pixels}" height="{pixels}" '
+            f'viewBox="0 0 {size} {size}" shape-rendering="crispEdges">'
+            f'<rect width="{size}" height="{size}" fill="#ffffff"/>'
+            f'<path d="{"".join(segments)}" fill="{fg_hex}"/></svg>\n'
+        )
+
+
+def pool_context() -> multiprocessing.context.BaseContext:
+    """
+    Start method for QR process pools.
+    
+    Workers must not inherit the caller's event loop or sockets, so use
+    forkserver, or spawn where forkserver is unavailable (e.g. Windows).
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def _render_one(job: tuple) -> str:
+    """Process-pool worker for generate_batch (module-level so it pickles)"""
+    address, output_path, box_size, border, compress_level = job
+    generator = _worker_generator(box_size, border, compress_level)
+    return generator.generate(address, output_file=output_path)
+
+
+@lru_cache(maxsize=8)
+def _worker_generator(box_size: int = 10, border: int = 2, compress_level: int = 1) -> QRGenerator:
+    """One generator per process and settings, so logo/font caches survive between jobs"""
+    return QRGenerator(box_size=box_size, border=border, compress_level=compress_level)
+
+
+def render_link_png(payment_link: str) -> bytes:
+    """Render a payment link QR to PNG bytes (picklable, for process pools)"""
+    return _worker_generator().generate_bytes(payment_link)
+
+
+def render_address_png(address: str) -> bytes:
+    """Render a labelled address QR to PNG bytes (picklable, for process pools)"""
+    buf = io.BytesIO()
+    _worker_generator().generate(address, output_file=buf)
+    return buf.getvalue()
 
 
 # Example usage
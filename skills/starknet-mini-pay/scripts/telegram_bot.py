@@ -25,23 +25,31 @@ Commands:
 import os
 import sys
 import asyncio
-import json
+import contextlib
+import signal
+import orjson
+import re
 import hmac
 import hashlib
-from datetime import datetime
+import secrets
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, Dict, Tuple
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, WebAppInfo
 from telegram.ext import (
     Application, CommandHandler, MessageHandler, 
     CallbackQueryHandler, ContextTypes, filters
 )
 from telegram.error import TelegramError
-from aiohttp import web
+from aiohttp import ClientSession, TCPConnector, web
 import logging
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from qr_generator import QRGenerator
+from qr_generator import pool_context, render_address_png, render_link_png
 from link_builder import PaymentLinkBuilder
 from invoice import InvoiceManager
 from mini_pay import MiniPay
@@ -50,65 +58,24 @@ from mini_pay import MiniPay
 # Configuration
 TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN", "")
 STARKNET_RPC = os.environ.get("STARKNET_RPC", "https://rpc.starknet.lava.build:443")
-WEBHOOK_SECRET = os.environ.get("WEBHOOK_SECRET", "your_secret_here")
-WEBHOOK_URL = os.environ.get("WEBHOOK_URL", "")  # For receiving tx confirmations
-
-# Logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-
-class StarknetMiniPayBot:
-    """Non-custodial Telegram bot for Starknet Mini-Pay"""
-    
-    # Wallet deep link formats
-    WALLET_DEEP_LINKS = {
-        "argent": "argent://starknet/pay",
-        "braavos": "braavos://starknet/pay",
-        "generic": "starknet://"
-    }
-    
-    def __init__(self, token: str):
-        self.token = token
-        self.qr = QRGenerator()
-        self.link_builder = PaymentLinkBuilder()
-        self.pay = MiniPay(rpc_url=STARKNET_RPC)
-        self.invoice_db = None  # Initialized in start()
-        
-        # Webhook state
-        self.webhook_url = WEBHOOK_URL
-        self.webhook_secret = WEBHOOK_SECRET
-        
-        # Application
-        self.app = Application.builder().token(token).build()
-        
-        # Register handlers
-        self._register_handlers()
-    
-    def _register_handlers(self):
-        """Register command and message handlers"""
-        
-        # Commands
-        self.app.add_handler(CommandHandler("start", self.cmd_start))
-        self.app.add_handler(CommandHandler("help", self.cmd_help))
-        self.app.add_handler(CommandHandler("link", self.cmd_link))
-        self.app.add_handler(CommandHandler("qr", self.cmd_qr))
-        self.app.add_handler(CommandHandler("invoice", self.cmd_invoice))
-        self.app.add_handler(CommandHandler("status", self.cmd_status))
-        self.app.add_handler(CommandHandler("webhook", self.cmd_webhook))
-        self.app.add_handler(CommandHandler("myaddress", self.cmd_myaddress))
-        
-        # Callbacks
-        self.app.add_handler(CallbackQueryHandler(self.callback_handler))
-        
-        # Fallback - handle text
-        self.app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_text))
-    
-    async def cmd_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Handle /start command"""
-        user = update.message.from_user
-        
-        welcome = f"""
+WEBHOOK_SECRET = os.environ.get("WEBHOOK_SECRET", "")  # Required for webhook mode
+# HMAC key for /webhook payment notifications; kept apart from WEBHOOK_SECRET,
+# which Telegram sends in plain text with every update
+PAYMENT_WEBHOOK_SECRET = os.environ.get("PAYMENT_WEBHOOK_SECRET", "")
+WEBHOOK_URL = os.environ.get("WEBHOOK_URL", "")  # Public base URL; enables webhook mode
+REDIS_URL = os.environ.get("REDIS_URL", "")  # Persist user addresses (memory if unset)
+MAX_CONCURRENT = int(os.environ.get("MAX_CONCURRENT", "64"))  # Updates handled at once
+
+# Telegram's secret_token alphabet; the old placeholder is never a real secret
+_WEBHOOK_SECRET_RE = re.compile(r"[A-Za-z0-9_-]{1,256}")
+_PLACEHOLDER_SECRET = "your_secret_here"
+
+# starknet:0x<address>[?query] embedded in a text message (whole hex run;
+# _build_urls rejects addresses of the wrong length)
+_LINK_RE = re.compile(r"starknet:0x[0-9a-fA-F]+(?:\?\S*)?")
+
+# Static replies, built once at import
+_WELCOME_HTML = """
 🪙 <b>Starknet Mini-Pay</b>
 
 Non-custodial P2P payments on Starknet.
@@ -131,20 +98,8 @@ Non-custodial P2P payments on Starknet.
 /myaddress - Set your Starknet address
 /help - Get help
 """
-        
-        keyboard = [
-            [InlineKeyboardButton("💸 Create Link", callback_data="link")],
-            [InlineKeyboardButton("📱 Get QR Code", callback_data="qr")],
-            [InlineKeyboardButton("📄 Create Invoice", callback_data="invoice")],
-        ]
-        
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
-        await update.message.reply_html(welcome, reply_markup=reply_markup)
-    
-    async def cmd_help(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Handle /help command"""
-        help_text = """
+
+_HELP_HTML = """
 🪙 <b>Starknet Mini-Pay Help</b>
 
 🔒 <b>Non-Custodial:</b> This bot never touches your keys.
@@ -179,8 +134,125 @@ No need to copy-paste addresses!
 <b>Payment Link Format:</b>
 starknet:<address>?amount=<value>&memo=<text>
 """
+
+_START_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("💸 Create Link", callback_data="link")],
+    [InlineKeyboardButton("📱 Get QR Code", callback_data="qr")],
+    [InlineKeyboardButton("📄 Create Invoice", callback_data="invoice")],
+])
+
+_CALLBACK_HTML = {
+    "link": (
+        "💸 <b>Create Payment Link</b>\n\n"
+        "Usage: /link [amount] [memo]\n\n"
+        "Example:\n"
+        "/link 0.05 coffee\n"
+        "/link 25 services\n\n"
+        "Creates a shareable link that opens in the user's wallet."
+    ),
+    "qr": (
+        "📱 <b>Get Your QR Code</b>\n\n"
+        "Use /myaddress to set your address first, then /qr to generate.\n\n"
+        "Share the QR to receive payments!"
+    ),
+    "invoice": (
+        "📄 <b>Create Invoice</b>\n\n"
+        "Usage: /invoice <amount> [memo]\n\n"
+        "Example:\n"
+        "/invoice 25 consulting\n"
+        "/invoice 0.1 subscription\n\n"
+        "Creates a payment request with expiry time."
+    ),
+}
+
+# Example notification body shown by /webhook (serialized once)
+_WEBHOOK_EXAMPLE_JSON = orjson.dumps({"tx_hash": "0x...", "status": "CONFIRMED", "amount": "0.05"}).decode()
+
+# Logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class StarknetMiniPayBot:
+    """Non-custodial Telegram bot for Starknet Mini-Pay"""
+    
+    # Wallet deep link formats
+    WALLET_DEEP_LINKS = {
+        "argent": "argent://starknet/pay",
+        "braavos": "braavos://starknet/pay",
+        "generic": "starknet://"
+    }
+    
+    # Route Telegram POSTs updates to in webhook mode
+    TELEGRAM_UPDATE_PATH = "/telegram"
+    
+    # Links behind "Copy Link" buttons (Telegram caps callback_data at 64 bytes)
+    PENDING_LINKS_SIZE = 4096
+    
+    # Rendered QR PNGs kept in memory (least recently used evicted first)
+    QR_CACHE_SIZE = 1024
+    
+    def __init__(self, token: str):
+        self.token = token
+        # QR rendering is CPU-bound; run it off the event loop in workers
+        # that don't inherit loop/socket state
+        self.qr_pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=pool_context(),
+        )
+        self._qr_cache: OrderedDict[str, bytes] = OrderedDict()
+        self._pending_links: OrderedDict[str, str] = OrderedDict()
+        self.link_builder = PaymentLinkBuilder()
+        self.http = None  # Shared HTTP session, opened in start()
+        self.pay = MiniPay(rpc_url=STARKNET_RPC)
+        self.invoice_db = None  # Initialized in start()
+        
+        # User address store: one pooled client shared by all handlers
+        self.redis = None
+        if REDIS_URL:
+            # Optional dependency: only needed when REDIS_URL is set
+            import redis.asyncio as aioredis
+            self.redis = aioredis.Redis.from_url(REDIS_URL, decode_responses=True)
+        
+        # Webhook state
+        self.webhook_url = WEBHOOK_URL.rstrip("/")
+        self.webhook_secret = WEBHOOK_SECRET
+        self.payment_webhook_secret = PAYMENT_WEBHOOK_SECRET
+        self._web_runner = None  # aiohttp runner, set when the server starts
+        
+        # Application: handle up to MAX_CONCURRENT updates at once (PTB gates
+        # dispatch with a semaphore; the default is one update at a time)
+        self.app = Application.builder().token(token).concurrent_updates(MAX_CONCURRENT).build()
+        
+        # Register handlers
+        self._register_handlers()
+    
+    def _register_handlers(self):
+        """Register command and message handlers"""
+        
+        # Commands
+        self.app.add_handler(CommandHandler("start", self.cmd_start))
+        self.app.add_handler(CommandHandler("help", self.cmd_help))
+        self.app.add_handler(CommandHandler("link", self.cmd_link))
+        self.app.add_handler(CommandHandler("qr", self.cmd_qr))
+        self.app.add_handler(CommandHandler("invoice", self.cmd_invoice))
+        self.app.add_handler(CommandHandler("status", self.cmd_status))
+        self.app.add_handler(CommandHandler("webhook", self.cmd_webhook))
+        self.app.add_handler(CommandHandler("myaddress", self.cmd_myaddress))
+        
+        # Callbacks
+        self.app.add_handler(CallbackQueryHandler(self.callback_handler))
         
-        await update.message.reply_html(help_text)
+        # Fallback - handle text
+        self.app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_text))
+    
+    async def cmd_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /start command"""
+        await update.message.reply_html(_WELCOME_HTML, reply_markup=_START_KEYBOARD)
+    
+    async def cmd_help(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /help command"""
+        await update.message.reply_html(_HELP_HTML)
     
     async def cmd_link(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /link command - create payment link"""
@@ -192,7 +264,7 @@ starknet:<address>?amount=<value>&memo=<text>
         memo = " ".join(args[1:]) if len(args) > 1 else "Payment"
         
         # Get user's address
-        address = self._get_user_address(user_id)
+        address = await self._get_user_address(user_id)
         
         if not address:
             await update.message.reply_text(
@@ -201,52 +273,40 @@ starknet:<address>?amount=<value>&memo=<text>
             return
         
         try:
-            # Create payment link
-            link = self.link_builder.create(
-                address=address,
-                amount=amount,
-                memo=memo
-            )
+            # Create payment link and wallet deep links
+            link, argent_link, braavos_link = self._build_urls(address, amount, memo)
             
-            # Create deep link version
-            deep_link = self._create_deep_link(address, amount, memo)
-            
-            # Generate QR
-            qr_file = f"link_{user_id}.png"
-            self.qr.generate_link(link, qr_file)
+            # Generate QR in memory
+            png = await self._cached_qr(link, render_link_png, link)
             
             # Build wallet buttons
             keyboard = [
-                [InlineKeyboardButton("🦊 Open in ArgentX", url=deep_link.get("argent", link))],
-                [InlineKeyboardButton("🦁 Open in Braavos", url=deep_link.get("braavos", link))],
-                [InlineKeyboardButton("🔗 Copy Link", callback_data=f"copy_link:{link}")],
+                [InlineKeyboardButton("🦊 Open in ArgentX", url=argent_link)],
+                [InlineKeyboardButton("🦁 Open in Braavos", url=braavos_link)],
+                [self._copy_link_button(link)],
             ]
             
             reply_markup = InlineKeyboardMarkup(keyboard)
             
             # Send QR with link info
-            with open(qr_file, "rb") as photo:
-                await update.message.reply_photo(
-                    photo=photo,
-                    caption=f"📱 <b>Payment Link</b>\n\n"
-                            f"<code>{link}</code>\n\n"
-                            f"{'Amount: ' + str(amount) + ' ETH' if amount else 'Amount: Not specified'}\n"
-                            f"Memo: {memo}",
-                    parse_mode="HTML",
-                    reply_markup=reply_markup
-                )
-            
-            # Clean up
-            os.remove(qr_file)
+            await update.message.reply_photo(
+                photo=png,
+                caption=f"📱 <b>Payment Link</b>\n\n"
+                        f"<code>{link}</code>\n\n"
+                        f"{'Amount: ' + str(amount) + ' ETH' if amount else 'Amount: Not specified'}\n"
+                        f"Memo: {memo}",
+                parse_mode="HTML",
+                reply_markup=reply_markup
+            )
             
         except Exception as e:
-            logger.error(f"Error creating link: {e}")
+            logger.error("Error creating link: %s", e)
             await update.message.reply_text(f"❌ Error: {e}")
     
     async def cmd_qr(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /qr command - generate QR for address"""
         user_id = str(update.message.from_user.id)
-        address = self._get_user_address(user_id)
+        address = await self._get_user_address(user_id)
         
         if not address:
             await update.message.reply_text(
@@ -255,31 +315,24 @@ starknet:<address>?amount=<value>&memo=<text>
             return
         
         try:
-            # Generate QR
-            qr_file = f"qr_{user_id}.png"
-            self.qr.generate(
-                address=address,
-                output_file=qr_file
-            )
+            # Generate QR in memory
+            png = await self._cached_qr(f"address:{address}", render_address_png, address)
             
             # Create receive link
             link = self.link_builder.create(address=address)
             
             # Send
-            with open(qr_file, "rb") as photo:
-                await update.message.reply_photo(
-                    photo=photo,
-                    caption=f"📱 <b>Your Receive QR</b>\n\n"
-                            f"<code>{address}</code>\n\n"
-                            f"Share this QR to receive payments!\n"
-                            f"Link: {link}",
-                    parse_mode="HTML"
-                )
-            
-            os.remove(qr_file)
+            await update.message.reply_photo(
+                photo=png,
+                caption=f"📱 <b>Your Receive QR</b>\n\n"
+                        f"<code>{address}</code>\n\n"
+                        f"Share this QR to receive payments!\n"
+                        f"Link: {link}",
+                parse_mode="HTML"
+            )
             
         except Exception as e:
-            logger.error(f"Error generating QR: {e}")
+            logger.error("Error generating QR: %s", e)
             await update.message.reply_text(f"❌ Error: {e}")
     
     async def cmd_invoice(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -301,7 +354,7 @@ starknet:<address>?amount=<value>&memo=<text>
         
         memo = " ".join(args[1:]) if len(args) > 1 else "Payment"
         user_id = str(update.message.from_user.id)
-        address = self._get_user_address(user_id)
+        address = await self._get_user_address(user_id)
         
         if not address:
             await update.message.reply_text(
@@ -323,37 +376,35 @@ starknet:<address>?amount=<value>&memo=<text>
                 expires_in = inv_manager.format_expiry(invoice)
                 
                 # Create deep link
-                deep_link = self._create_deep_link(address, amount, f"Invoice #{invoice.id[:8]} - {memo}")
+                _, argent_link, braavos_link = self._build_urls(
+                    address, amount, f"Invoice #{invoice.id[:8]} - {memo}"
+                )
                 
-                # Generate QR
-                qr_file = f"invoice_{user_id}.png"
-                self.qr.generate_link(payment_url, qr_file)
+                # Generate QR in memory
+                png = await self._render_qr(render_link_png, payment_url)
                 
                 keyboard = [
-                    [InlineKeyboardButton("🦊 Pay with ArgentX", url=deep_link.get("argent", payment_url))],
-                    [InlineKeyboardButton("🦁 Pay with Braavos", url=deep_link.get("braavos", payment_url))],
-                    [InlineKeyboardButton("🔗 Copy Link", callback_data=f"copy_link:{payment_url}")],
+                    [InlineKeyboardButton("🦊 Pay with ArgentX", url=argent_link)],
+                    [InlineKeyboardButton("🦁 Pay with Braavos", url=braavos_link)],
+                    [self._copy_link_button(payment_url)],
                 ]
                 
                 reply_markup = InlineKeyboardMarkup(keyboard)
                 
-                with open(qr_file, "rb") as photo:
-                    await update.message.reply_photo(
-                        photo=photo,
-                        caption=f"📄 <b>Invoice Created</b>\n\n"
-                                f"ID: <code>{invoice.id}</code>\n"
-                                f"Amount: {amount} USDC\n"
-                                f"Memo: {memo}\n"
-                                f"Expires: {expires_in}\n\n"
-                                f"<code>{payment_url}</code>",
-                        parse_mode="HTML",
-                        reply_markup=reply_markup
-                    )
-                
-                os.remove(qr_file)
+                await update.message.reply_photo(
+                    photo=png,
+                    caption=f"📄 <b>Invoice Created</b>\n\n"
+                            f"ID: <code>{invoice.id}</code>\n"
+                            f"Amount: {amount} USDC\n"
+                            f"Memo: {memo}\n"
+                            f"Expires: {expires_in}\n\n"
+                            f"<code>{payment_url}</code>",
+                    parse_mode="HTML",
+                    reply_markup=reply_markup
+                )
                 
         except Exception as e:
-            logger.error(f"Error creating invoice: {e}")
+            logger.error("Error creating invoice: %s", e)
             await update.message.reply_text(f"❌ Error: {e}")
     
     async def cmd_status(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -365,8 +416,8 @@ starknet:<address>?amount=<value>&memo=<text>
         tx_hash = context.args[0]
         
         try:
-            status = await self.pay.get_transaction_status(tx_hash)
-            tx_data = await self.pay.get_transaction(tx_hash)
+            # Status and transaction data in a single RPC round-trip
+            status, tx_data = await self.pay.get_status_and_transaction(tx_hash)
             
             status_emoji = {
                 "CONFIRMED": "✅",
@@ -390,7 +441,7 @@ TX: <code>{tx_hash}</code>
             await update.message.reply_html(response)
             
         except Exception as e:
-            logger.error(f"Error checking status: {e}")
+            logger.error("Error checking status: %s", e)
             await update.message.reply_text(f"❌ Error: {e}")
     
     async def cmd_webhook(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -410,23 +461,13 @@ TX: <code>{tx_hash}</code>
             await update.message.reply_text("❌ URL must start with http:// or https://")
             return
         
-        # Store for this chat
-        chat_id = str(update.message.chat_id)
-        
-        # In production, store in database
-        webhook_config = {
-            "url": webhook_url,
-            "chat_id": chat_id,
-            "set_at": datetime.now().isoformat()
-        }
-        
-        # TODO: Store in database
+        # TODO: Store in database (URL and chat_id for this chat)
         
         await update.message.reply_text(
             f"✅ <b>Webhook Set</b>\n\n"
             f"URL: {webhook_url}\n\n"
             f"POST format:\n"
-            f"<pre>{json.dumps({'tx_hash': '0x...', 'status': 'CONFIRMED', 'amount': '0.05'})}</pre>",
+            f"<pre>{_WEBHOOK_EXAMPLE_JSON}</pre>",
             parse_mode="HTML"
         )
     
@@ -448,7 +489,7 @@ TX: <code>{tx_hash}</code>
         
         # Store (in production, use database)
         user_id = str(update.message.from_user.id)
-        self._set_user_address(user_id, address)
+        await self._set_user_address(user_id, address)
         
         await update.message.reply_text(
             f"✅ <b>Address Set</b>\n\n"
@@ -464,65 +505,32 @@ TX: <code>{tx_hash}</code>
         
         data = query.data
         
-        if data == "link":
-            await query.edit_message_text(
-                "💸 <b>Create Payment Link</b>\n\n"
-                "Usage: /link [amount] [memo]\n\n"
-                "Example:\n"
-                "/link 0.05 coffee\n"
-                "/link 25 services\n\n"
-                "Creates a shareable link that opens in the user's wallet.",
-                parse_mode="HTML"
-            )
-        elif data == "qr":
-            await query.edit_message_text(
-                "📱 <b>Get Your QR Code</b>\n\n"
-                "Use /myaddress to set your address first, then /qr to generate.\n\n"
-                "Share the QR to receive payments!",
-                parse_mode="HTML"
-            )
-        elif data == "invoice":
-            await query.edit_message_text(
-                "📄 <b>Create Invoice</b>\n\n"
-                "Usage: /invoice <amount> [memo]\n\n"
-                "Example:\n"
-                "/invoice 25 consulting\n"
-                "/invoice 0.1 subscription\n\n"
-                "Creates a payment request with expiry time.",
-                parse_mode="HTML"
-            )
-        elif data.startswith("copy_link:"):
-            link = data.split(":", 1)[1]
-            await query.edit_message_caption(
-                caption=f"🔗 <b>Payment Link</b>\n\n<code>{link}</code>",
-                parse_mode="HTML"
-            )
+        if data in _CALLBACK_HTML:
+            await query.edit_message_text(_CALLBACK_HTML[data], parse_mode="HTML")
+        elif data.startswith("cl:"):
+            link = self._pending_links.get(data[3:])
+            if link is None:
+                caption = "⌛ This link has expired. Create a new one with /link."
+            else:
+                caption = f"🔗 <b>Payment Link</b>\n\n<code>{link}</code>"
+            await query.edit_message_caption(caption=caption, parse_mode="HTML")
     
     async def handle_text(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle text messages"""
-        text = update.message.text.strip()
-        
-        # Detect payment link
-        if text.startswith("starknet:") or "starknet:0x" in text:
+        # Detect payment link (anywhere in the message, query included)
+        match = _LINK_RE.search(update.message.text)
+        if match:
             try:
                 # Parse link
-                if "?" in text:
-                    url = text
-                else:
-                    url = f"starknet:{text}"
-                
+                url = match.group(0)
                 data = self.link_builder.parse(url)
                 
                 # Create deep link
-                deep_link = self._create_deep_link(
-                    data.address, 
-                    data.amount, 
-                    data.memo
-                )
+                _, argent_link, braavos_link = self._build_urls(data.address, data.amount, data.memo)
                 
                 keyboard = [
-                    [InlineKeyboardButton("🦊 Pay with ArgentX", url=deep_link.get("argent", url))],
-                    [InlineKeyboardButton("🦁 Pay with Braavos", url=deep_link.get("braavos", url))],
+                    [InlineKeyboardButton("🦊 Pay with ArgentX", url=argent_link)],
+                    [InlineKeyboardButton("🦁 Pay with Braavos", url=braavos_link)],
                 ]
                 
                 reply_markup = InlineKeyboardMarkup(keyboard)
@@ -540,38 +548,44 @@ TX: <code>{tx_hash}</code>
             except Exception as e:
                 await update.message.reply_text(f"❌ Invalid link: {e}")
     
-    def _create_deep_link(
-        self, 
-        address: str, 
-        amount: float = None, 
+    def _build_urls(
+        self,
+        address: str,
+        amount: float = None,
         memo: str = None
-    ) -> dict:
-        """Create wallet deep links"""
-        
-        # Build payment URL
-        params = [f"address={address}"]
-        if amount:
-            params.append(f"amount={amount}")
-        if memo:
-            params.append(f"memo={memo}")
-        
-        payment_url = f"?{ '&'.join(params)}"
-        
-        return {
-            "argent": f"argent://starknet/pay{payment_url}",
-            "braavos": f"braavos://starknet/pay{payment_url}",
-            "generic": f"starknet:{address}?{'&'.join(params[1:])}" if params[1:] else f"starknet:{address}"
-        }
+    ) -> Tuple[str, str, str]:
+        """Build (payment link, ArgentX link, Braavos link) from one encoded query"""
+        links = self.link_builder.create_all_links(address, amount, memo)  # validates address
+        return links["payment"], links["argent"], links["braavos"]
+    
+    def _copy_link_button(self, link: str) -> InlineKeyboardButton:
+        """Copy Link button; the link stays server-side behind a short token"""
+        token = secrets.token_urlsafe(6)
+        self._pending_links[token] = link
+        if len(self._pending_links) > self.PENDING_LINKS_SIZE:
+            self._pending_links.popitem(last=False)
+        return InlineKeyboardButton("🔗 Copy Link", callback_data=f"cl:{token}")
+    
+    async def _render_qr(self, render: Callable[[str], bytes], data: str) -> bytes:
+        """Render a QR to PNG bytes in the process pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.qr_pool, render, data)
+    
+    async def _cached_qr(self, key: str, render: Callable[[str], bytes], data: str) -> bytes:
+        """Return cached PNG bytes for key, rendering on a miss (LRU eviction)"""
+        png = self._qr_cache.get(key)
+        if png is not None:
+            self._qr_cache.move_to_end(key)
+            return png
+        png = await self._render_qr(render, data)
+        self._qr_cache[key] = png
+        if len(self._qr_cache) > self.QR_CACHE_SIZE:
+            self._qr_cache.popitem(last=False)
+        return png
     
     def _validate_address(self, address: str) -> bool:
         """Validate Starknet address format"""
-        if not address.startswith("0x"):
-            address = f"0x{address}"
-        
-        if len(address) != 66:
-            return False
-        
-        return all(c in "0123456789abcdef" for c in address[2:])
+        return self.link_builder.is_valid_address(address)
     
     def _is_number(self, s: str) -> bool:
         """Check if string is a number"""
@@ -581,86 +595,217 @@ TX: <code>{tx_hash}</code>
         except ValueError:
             return False
     
-    def _get_user_address(self, user_id: str) -> str:
-        """Get user's stored address (from memory/db)"""
-        # In production, read from database
-        return user_addresses.get(user_id, "")
+    async def _get_user_address(self, user_id: str) -> str:
+        """Get user's stored address (Redis if configured, else memory)"""
+        if self.redis is None:
+            state = user_states.get(user_id)
+            return state.address if state else ""
+        return await self.redis.get(f"addr:{user_id}") or ""
     
-    def _set_user_address(self, user_id: str, address: str):
+    async def _set_user_address(self, user_id: str, address: str):
         """Store user's address"""
-        user_addresses[user_id] = address.lower()
+        if self.redis is None:
+            user_states.setdefault(user_id, UserState()).address = address.lower()
+        else:
+            await self.redis.set(f"addr:{user_id}", address.lower())
     
     async def start(self):
         """Start the bot and webhook server"""
-        # Initialize invoice database
-        async with InvoiceManager() as inv:
-            pass  # Database initialized
-        
         logger.info("Starting Starknet Mini-Pay Bot...")
-        await self.app.initialize()
-        await self.app.start()
         
-        # Start webhook server if URL configured
-        if self.webhook_url:
-            await self._start_webhook_server()
-        
-        # Start polling
-        await self.app.updater.start_polling()
-        
-        logger.info("Bot started!")
+        # One keep-alive session for all outbound HTTP (Starknet RPC included)
+        self.http = ClientSession(
+            connector=TCPConnector(limit=100, ttl_dns_cache=300, keepalive_timeout=60)
+        )
+        self.pay = MiniPay(rpc_url=STARKNET_RPC, session=self.http)
         
-        # Keep running
-        while True:
-            await asyncio.sleep(3600)
+        # Everything below may fail part-way; stop() releases whatever was set up
+        try:
+            # Independent setup steps: run them side by side
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(self._init_invoice_db())
+                tg.create_task(self.app.initialize())
+                tg.create_task(self._warmup_rpc())
+            
+            await self.app.start()
+            
+            # With a public URL, Telegram pushes updates to our server;
+            # otherwise fall back to long polling
+            if self.webhook_url and not self._webhook_secret_configured():
+                logger.error(
+                    "WEBHOOK_SECRET must be set to 1-256 characters of A-Za-z0-9_- "
+                    "for webhook mode; falling back to polling"
+                )
+                self.webhook_url = ""
+            
+            if self.webhook_url:
+                await self._start_webhook_server()
+                await self.app.bot.set_webhook(
+                    url=f"{self.webhook_url}{self.TELEGRAM_UPDATE_PATH}",
+                    secret_token=self.webhook_secret,
+                    allowed_updates=Update.ALL_TYPES,
+                )
+            else:
+                await self.app.updater.start_polling()
+            
+            logger.info("Bot started!")
+            
+            # Run until SIGINT/SIGTERM, then shut down cleanly
+            stop = asyncio.Event()
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                with contextlib.suppress(NotImplementedError):  # e.g. Windows
+                    loop.add_signal_handler(sig, stop.set)
+            
+            await stop.wait()
+        finally:
+            await self.stop()
+    
+    def _webhook_secret_configured(self) -> bool:
+        """Check that an explicit secret usable as Telegram's secret_token is set"""
+        return (
+            self.webhook_secret != _PLACEHOLDER_SECRET
+            and _WEBHOOK_SECRET_RE.fullmatch(self.webhook_secret) is not None
+        )
+    
+    def _payment_secret_configured(self) -> bool:
+        """Check that a payment HMAC key distinct from Telegram's secret is set"""
+        return (
+            bool(self.payment_webhook_secret)
+            and self.payment_webhook_secret != _PLACEHOLDER_SECRET
+            and self.payment_webhook_secret != self.webhook_secret
+        )
+    
+    async def _init_invoice_db(self):
+        """Create the invoice database tables if needed"""
+        async with InvoiceManager():
+            pass
+    
+    async def _warmup_rpc(self):
+        """Open a pooled connection to the RPC node before the first command"""
+        try:
+            await self.pay.get_block_number()
+        except Exception as e:
+            logger.warning("RPC warm-up failed: %s", e)
+    
+    async def stop(self):
+        """Stop receiving updates and release network and worker resources"""
+        logger.info("Stopping Starknet Mini-Pay Bot...")
+        if self.app.updater.running:
+            await self.app.updater.stop()
+        if self.app.running:
+            await self.app.stop()
+        await self.app.shutdown()  # no-op if never initialized
+        
+        if self._web_runner is not None:
+            await self._web_runner.cleanup()
+        if self.http is not None:
+            await self.http.close()
+        if self.redis is not None:
+            await self.redis.aclose()
+        # Joining workers blocks; keep it off the event loop
+        await asyncio.get_running_loop().run_in_executor(
+            None, partial(self.qr_pool.shutdown, cancel_futures=True)
+        )
     
     async def _start_webhook_server(self):
-        """Start webhook server for transaction notifications"""
+        """Start webhook server for Telegram updates and transaction notifications"""
         app = web.Application()
         
         # Webhook endpoint
         app.router.add_post("/webhook", self.handle_webhook)
         
+        # Telegram updates (registered via set_webhook in start())
+        app.router.add_post(self.TELEGRAM_UPDATE_PATH, self.handle_telegram_update)
+        
         # Health check
         app.router.add_get("/health", self.handle_health)
         
         runner = web.AppRunner(app)
         await runner.setup()
+        self._web_runner = runner
         site = web.TCPSite(runner, "0.0.0.0", 8080)
         await site.start()
         
-        logger.info(f"Webhook server running on port 8080")
+        logger.info("Webhook server running on port 8080")
     
     async def handle_webhook(self, request: web.Request):
         """Handle incoming webhook from payment system"""
+        # Body must be signed: X-Signature = hex HMAC-SHA256(PAYMENT_WEBHOOK_SECRET, body);
+        # without an explicit secret no signature can be trusted
+        if not self._payment_secret_configured():
+            return _json_response({"error": "webhook secret not configured"}, status=403)
+        
+        raw = await request.read()
+        expected = hmac.new(self.payment_webhook_secret.encode(), raw, hashlib.sha256).hexdigest().encode()
+        # Compare bytes: compare_digest raises TypeError on non-ASCII str
+        signature = request.headers.get("X-Signature", "").encode(errors="replace")
+        if not hmac.compare_digest(signature, expected):
+            return _json_response({"error": "invalid signature"}, status=401)
+        
         try:
-            data = await request.json()
+            data = orjson.loads(raw)
             
             tx_hash = data.get("tx_hash")
             status = data.get("status")
             amount = data.get("amount")
             
-            logger.info(f"Webhook received: {tx_hash} - {status}")
+            logger.info("Webhook received: %s - %s", tx_hash, status)
             
             # Get chat_id from database and notify
             # TODO: Implement chat lookup
             
-            return web.json_response({"status": "ok"})
+            return _json_response({"status": "ok"})
             
         except Exception as e:
-            logger.error(f"Webhook error: {e}")
-            return web.json_response({"error": str(e)}, status=500)
+            logger.error("Webhook error: %s", e)
+            return _json_response({"error": str(e)}, status=500)
+    
+    async def handle_telegram_update(self, request: web.Request):
+        """Feed an update pushed by Telegram into the application queue"""
+        # Compare bytes: compare_digest raises TypeError on non-ASCII str
+        secret = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "").encode(errors="replace")
+        if not hmac.compare_digest(secret, self.webhook_secret.encode()):
+            return web.Response(status=403)
+        
+        try:
+            data = orjson.loads(await request.read())
+        except orjson.JSONDecodeError:
+            return web.Response(status=400)
+        if not isinstance(data, dict):
+            return web.Response(status=400)
+        try:
+            update = Update.de_json(data, self.app.bot)
+        except Exception as e:
+            logger.warning("Malformed Telegram update: %s", e)
+            return web.Response(status=400)
+        if update is None:
+            return web.Response(status=400)
+        await self.app.update_queue.put(update)
+        return web.Response()
     
     async def handle_health(self, request: web.Request):
         """Health check endpoint"""
-        return web.json_response({"status": "healthy"})
+        return _json_response({"status": "healthy"})
     
     def run(self):
         """Run the bot (blocking)"""
         asyncio.run(self.start())
 
 
-# In-memory user storage (use database in production)
-user_addresses = {}
+def _json_response(data: dict, status: int = 200) -> web.Response:
+    """JSON response encoded with orjson"""
+    return web.Response(body=orjson.dumps(data), status=status, content_type="application/json")
+
+
+@dataclass(slots=True)
+class UserState:
+    """Per-user settings (slotted: no per-instance __dict__)"""
+    address: str = ""
+
+
+# In-memory user storage, used when REDIS_URL is not set
+user_states: Dict[str, UserState] = {}
 
 
 # Main entry point